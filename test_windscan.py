@@ -0,0 +1,280 @@
+import datetime
+import decimal
+import fractions
+import os
+import tempfile
+import unittest
+from unittest import mock
+
+import requests
+
+import windscan
+
+
+def _chunked(data, size):
+    return [data[i:i + size] for i in range(0, len(data), size)]
+
+
+class ScanForJobIdTest(unittest.TestCase):
+    META = b'<META HTTP-EQUIV="Refresh" CONTENT="2; URL=https://www.ready.noaa.gov/HYPUB-BIN/trajresults.pl?jobidno=130509">'
+
+    def test_finds_id_for_every_chunk_size(self):
+        # Covers the marker and the digits straddling chunk boundaries
+        body = b"<html><head>" + self.META + b"</head></html>"
+        for size in range(1, len(body) + 1):
+            with self.subTest(size=size):
+                self.assertEqual(windscan._scan_for_job_id(_chunked(body, size)), "130509")
+
+    def test_id_at_end_of_body(self):
+        body = b"see /hypub-bin/trajresults.pl?jobidno=42"
+        for size in range(1, len(body) + 1):
+            with self.subTest(size=size):
+                self.assertEqual(windscan._scan_for_job_id(_chunked(body, size)), "42")
+
+    def test_skips_marker_without_digits(self):
+        body = (b'<a href="/hypub-bin/trajresults.pl?jobidno=abc">x</a>'
+                b'<a href="/hypub-bin/trajresults.pl?jobidno=999">y</a>')
+        for size in range(1, len(body) + 1):
+            with self.subTest(size=size):
+                self.assertEqual(windscan._scan_for_job_id(_chunked(body, size)), "999")
+
+    def test_no_id(self):
+        self.assertIsNone(windscan._scan_for_job_id([]))
+        self.assertIsNone(windscan._scan_for_job_id([b"<html>no results link</html>"]))
+        self.assertIsNone(windscan._scan_for_job_id([b"/hypub-bin/trajresults.pl?jobidno="]))
+        self.assertIsNone(windscan._scan_for_job_id([b'/hypub-bin/trajresults.pl?jobidno="']))
+
+
+class RunHysplitJobValidationTest(unittest.TestCase):
+    def test_rejects_invalid_dates(self):
+        cases = [dict(start_year=100), dict(start_month=13), dict(start_month=2, start_day=29, start_year=23),
+                 dict(start_month=4, start_day=31), dict(start_day=0), dict(start_hour=24),
+                 dict(start_year=22.0), dict(start_day=5.5), dict(start_hour="1"), dict(start_month=True)]
+        with mock.patch.object(windscan, "submit_hysplit_job") as submit:
+            for kwargs in cases:
+                with self.subTest(**kwargs), self.assertLogs(windscan.log, "ERROR"):
+                    self.assertEqual(windscan.run_hysplit_job(**kwargs), (None, None))
+            submit.assert_not_called()
+
+    def test_accepts_every_calendar_day(self):
+        with mock.patch.object(windscan, "submit_hysplit_job", return_value=("1", None)) as submit:
+            for year in (0, 23, 24):
+                start = datetime.datetime(2000 + year, 1, 1)
+                while start.year == 2000 + year:
+                    windscan.run_hysplit_job(start_year=year, start_month=start.month,
+                                             start_day=start.day, start_hour=start.hour)
+                    start += datetime.timedelta(days=1)
+            self.assertEqual(submit.call_count, 366 + 365 + 366)
+
+    def test_accepts_int_like_fields(self):
+        class IntLike:
+            # Behaves like numpy.int64 as far as validation is concerned
+            def __init__(self, value):
+                self.value = value
+
+            def __index__(self):
+                return self.value
+
+            def __radd__(self, other):
+                return other + self.value
+
+        with mock.patch.object(windscan, "submit_hysplit_job", return_value=("1", None)) as submit:
+            windscan.run_hysplit_job(start_year=IntLike(24), start_month=IntLike(2),
+                                     start_day=IntLike(29), start_hour=IntLike(22))
+        submit.assert_called_once_with(41.98, -87.9, datetime.datetime(2024, 2, 29, 22))
+
+    def test_accepts_real_number_coordinates(self):
+        session = mock.Mock()
+        session.post.side_effect = requests.exceptions.ConnectionError("offline")
+        for latitude, longitude in ((decimal.Decimal("41.98"), fractions.Fraction(-879, 10)), (41, -87)):
+            with self.subTest(latitude=latitude, longitude=longitude), \
+                    mock.patch.object(windscan, "_get_session", return_value=session), \
+                    self.assertLogs(windscan.log, "ERROR") as logs:
+                windscan.submit_hysplit_job(latitude, longitude, datetime.datetime(2022, 10, 29, 22))
+            self.assertEqual(logs.output, ["ERROR:windscan:Error during step 1: offline"])
+
+    def test_rejects_invalid_coordinates(self):
+        for latitude, longitude in ((91, 0), (0, -181), ("41.98", -87.9)):
+            with self.subTest(latitude=latitude, longitude=longitude), self.assertLogs(windscan.log, "ERROR"):
+                self.assertEqual(windscan.submit_hysplit_job(latitude, longitude, datetime.datetime(2022, 10, 29, 22)),
+                                 (None, None))
+
+
+class _FakeClock:
+    def __init__(self):
+        self.now = 0.0
+        self.sleeps = []
+
+    def monotonic(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.sleeps.append(seconds)
+        self.now += seconds
+
+
+class WaitForResultsTest(unittest.TestCase):
+    URL = "https://example.invalid/gis.zip"
+
+    def setUp(self):
+        self.clock = _FakeClock()
+        patcher = mock.patch.object(windscan, "time", self.clock)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_returns_response_once_ready(self):
+        ready = mock.Mock(status_code=200)
+        session = mock.Mock()
+        session.head.side_effect = [mock.Mock(status_code=404), mock.Mock(status_code=404), ready]
+        self.assertIs(windscan._wait_for_results(session, self.URL), ready)
+        self.assertEqual(self.clock.sleeps, [0.5, 0.75])
+        session.head.assert_called_with(self.URL, allow_redirects=True, timeout=windscan._POLL_REQUEST_TIMEOUT)
+
+    def test_keeps_polling_through_request_errors(self):
+        ready = mock.Mock(status_code=200)
+        session = mock.Mock()
+        session.head.side_effect = [requests.exceptions.RetryError("503"), requests.exceptions.ReadTimeout("slow"),
+                                    requests.exceptions.ConnectionError("reset"), ready]
+        self.assertIs(windscan._wait_for_results(session, self.URL), ready)
+
+    def test_gives_up_at_deadline_with_capped_backoff(self):
+        session = mock.Mock()
+        session.head.return_value = mock.Mock(status_code=404)
+        self.assertIsNone(windscan._wait_for_results(session, self.URL, timeout=30))
+        self.assertLessEqual(self.clock.now, 30)
+        self.assertEqual(max(self.clock.sleeps), 4.0)
+
+
+class DownloadResultsTest(unittest.TestCase):
+    def test_wrapper_forwards_start_datetime(self):
+        with mock.patch.object(windscan, "download_hysplit_results", return_value="gis.zip") as download:
+            self.assertEqual(windscan.download_results("130509", "session", 9, 2, 28, 3), "gis.zip")
+        download.assert_called_once_with("130509", "session", datetime.datetime(2009, 2, 28, 3))
+
+    def test_wrapper_rejects_invalid_fields(self):
+        with mock.patch.object(windscan, "download_hysplit_results") as download, \
+                self.assertLogs(windscan.log, "ERROR"):
+            self.assertIsNone(windscan.download_results("130509", "session", 22, 2, 30, 3))
+        download.assert_not_called()
+
+    START = datetime.datetime(2009, 2, 28, 3)
+    FILENAME = "gis_09-02-28-03_130509.zip"
+
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        cwd = os.getcwd()
+        os.chdir(directory.name)
+        self.addCleanup(os.chdir, cwd)
+
+    def _download(self, session, headers):
+        head_response = mock.Mock(headers={"content-type": "application/zip", **headers})
+        with mock.patch.object(windscan, "_wait_for_results", return_value=head_response):
+            return windscan.download_hysplit_results("130509", session, self.START)
+
+    def test_filename_uses_start_datetime(self):
+        session = mock.Mock()
+        session.get.return_value.raw = mock.Mock(read=mock.Mock(side_effect=[b"zip", b""]))
+        self.assertEqual(self._download(session, {}), self.FILENAME)
+        with open(self.FILENAME, "rb") as f:
+            self.assertEqual(f.read(), b"zip")
+
+    def _failing_ranges(self, session, url, filename, size):
+        # Preallocate like the real ranged download, then fail mid-way
+        with open(filename, "wb") as f:
+            f.truncate(size)
+        raise requests.exceptions.ConnectionError("reset")
+
+    def test_failed_range_download_falls_back(self):
+        session = mock.Mock()
+        session.get.return_value.raw = mock.Mock(read=mock.Mock(side_effect=[b"zip", b""]))
+        range_headers = {"content-length": str(windscan._RANGED_MIN_SIZE), "accept-ranges": "bytes"}
+        with mock.patch.object(windscan, "_download_ranges", self._failing_ranges), \
+                self.assertLogs(windscan.log, "WARNING"):
+            self.assertEqual(self._download(session, range_headers), self.FILENAME)
+        with open(self.FILENAME, "rb") as f:
+            self.assertEqual(f.read(), b"zip")
+
+    def test_failed_download_removes_partial_file(self):
+        session = mock.Mock()
+        session.get.side_effect = requests.exceptions.ConnectionError("reset")
+        range_headers = {"content-length": str(windscan._RANGED_MIN_SIZE), "accept-ranges": "bytes"}
+        with mock.patch.object(windscan, "_download_ranges", self._failing_ranges), \
+                self.assertLogs(windscan.log, "WARNING"):
+            self.assertIsNone(self._download(session, range_headers))
+        self.assertFalse(os.path.exists(self.FILENAME))
+
+    def test_failed_poll_keeps_existing_file(self):
+        with open(self.FILENAME, "wb") as f:
+            f.write(b"old")
+        with mock.patch.object(windscan, "_wait_for_results", return_value=None), \
+                self.assertLogs(windscan.log, "ERROR"):
+            self.assertIsNone(windscan.download_hysplit_results("130509", mock.Mock(), self.START))
+        self.assertTrue(os.path.exists(self.FILENAME))
+
+
+class _FakeRangeResponse:
+    def __init__(self, status_code, body):
+        self.status_code = status_code
+        self.body = body
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        return False
+
+    def raise_for_status(self):
+        pass
+
+    def iter_content(self, chunk_size):
+        return _chunked(self.body, 7)
+
+
+class _FakeRangeSession:
+    def __init__(self, data, status_code=206, truncate=False):
+        self.data = data
+        self.status_code = status_code
+        self.truncate = truncate
+
+    def get(self, url, headers, stream):
+        start, end = (int(n) for n in headers["Range"][len("bytes="):].split("-"))
+        if self.status_code != 206:
+            return _FakeRangeResponse(self.status_code, self.data)
+        body = self.data[start:end + 1]
+        return _FakeRangeResponse(206, body[:-1] if self.truncate and start == 0 else body)
+
+
+@unittest.skipUnless(hasattr(os, "pwrite"), "os.pwrite is not available")
+class DownloadRangesTest(unittest.TestCase):
+    DATA = bytes(range(256)) * 4 + b"tail"
+
+    def setUp(self):
+        handle, self.path = tempfile.mkstemp()
+        os.close(handle)
+        self.addCleanup(os.remove, self.path)
+
+    def _download(self, session):
+        return windscan._download_ranges(session, "https://example.invalid/gis.zip", self.path, len(self.DATA))
+
+    def test_downloads_all_parts(self):
+        self.assertTrue(self._download(_FakeRangeSession(self.DATA)))
+        with open(self.path, "rb") as f:
+            self.assertEqual(f.read(), self.DATA)
+
+    def test_handles_short_writes(self):
+        real_pwrite = os.pwrite
+        with mock.patch.object(windscan.os, "pwrite", lambda fd, data, offset: real_pwrite(fd, data[:3], offset)):
+            self.assertTrue(self._download(_FakeRangeSession(self.DATA)))
+        with open(self.path, "rb") as f:
+            self.assertEqual(f.read(), self.DATA)
+
+    def test_ignored_range_header(self):
+        self.assertFalse(self._download(_FakeRangeSession(self.DATA, status_code=200)))
+
+    def test_truncated_part(self):
+        self.assertFalse(self._download(_FakeRangeSession(self.DATA, truncate=True)))
+
+
+if __name__ == "__main__":
+    unittest.main()
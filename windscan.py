@@ -1,37 +1,183 @@
-import requests
-import re
+# requests is imported inside the functions that use it, so that the
+# command line (e.g. --help) starts without loading the HTTP stack
 import time
-import json
-from urllib.parse import urlparse, parse_qs
+import os
 import shutil
+import atexit
+import threading
+import weakref
+import calendar
+import logging
+import operator
 import datetime # Added for date calculations
+from concurrent.futures import ThreadPoolExecutor
+from types import MappingProxyType
 
-def _get_month_abbr(month):
-    """Returns the 3-letter lowercase month abbreviation."""
+log = logging.getLogger(__name__)
+
+# Lowercase month abbreviations as used in the GDAS file names, e.g. gdas1.oct22.w5
+_MONTH_ABBRS = ("jan", "feb", "mar", "apr", "may", "jun", "jul", "aug", "sep", "oct", "nov", "dec")
+
+# Days per month in a common year; February gains a day in leap years
+_DAYS_IN_MONTH = (31, 28, 31, 30, 31, 30, 31, 31, 30, 31, 30, 31)
+
+# Both the meta refresh tag and the results link in the job submission response point here (step 5)
+_JOB_ID_MARKER = b"/hypub-bin/trajresults.pl?jobidno="
+
+# Headers often remain similar, define a base set
+BASE_HEADERS = {
+    "accept": "text/html,application/xhtml+xml,application/xml;q=0.9,image/avif,image/webp,image/apng,*/*;q=0.8,application/signed-exchange;v=b3;q=0.7",
+    "accept-language": "en-US,en;q=0.9,sv;q=0.8,ja;q=0.7,de;q=0.6,la;q=0.5",
+    "sec-ch-ua": '"Google Chrome";v="135", "Not-A.Brand";v="8", "Chromium";v="135"',
+    "sec-ch-ua-mobile": "?1",
+    "sec-ch-ua-platform": '"Android"',
+    "sec-fetch-dest": "document",
+    "sec-fetch-mode": "navigate",
+    "sec-fetch-site": "same-origin",
+    "upgrade-insecure-requests": "1",
+    "Referrer-Policy": "strict-origin-when-cross-origin"
+}
+
+# Extra headers for the form submissions; BASE_HEADERS are set on the session.
+# The steps only differ in the Referer of the form being submitted. They are
+# built once at import and frozen, since every job passes the same objects.
+_FORM_HEADERS = {"cache-control": "max-age=0",
+                 "content-type": "application/x-www-form-urlencoded",
+                 "sec-fetch-user": "?1"
+                }
+_HEADERS_STEP1 = MappingProxyType({**_FORM_HEADERS, "Referer": "https://www.ready.noaa.gov/hypub-bin/trajtype.pl?runtype=archive"})
+_HEADERS_STEP2 = MappingProxyType({**_FORM_HEADERS, "Referer": "https://www.ready.noaa.gov/hypub-bin/trajasrc.pl"})
+_HEADERS_STEP3 = MappingProxyType({**_FORM_HEADERS, "Referer": "https://www.ready.noaa.gov/hypub-bin/trajsrcm.pl"})
+_HEADERS_STEP4 = MappingProxyType({**_FORM_HEADERS, "Referer": "https://www.ready.noaa.gov/hypub-bin/traj1.pl"})
+
+# Form bodies, pre-encoded so each job only fills in its own fields with a single bytes % format
+_DATA1 = b"nsrc=1&trjtype=1"
+_DATA2_FMT = b"metdata=GDAS1&SOURCELOC=decdegree&Lat=%.6f&Latns=%s&Lon=%.6f&Lonew=%s&Latd=&Latm=&Lats=&Latdns=N&Lond=&Lonm=&Lons=&Londew=W&CITYNAME=&WMO="
+_DATA3_PREFIX = b"mfile="
+_DATA4_FMT = b"direction=Backward&vertical=0&Start+year=%02d&Start+month=%d&Start+day=%d&Start+hour=%d&duration=168&repeatsrc=0&ntrajs=24&Source+lat=%.6f&Source+lon=%.6f&Source+lat2=&Source+lon2=&Source+lat3=&Source+lon3=&Midlayer+height=No&Source+hgt1=500&Source+hunit=0&Source+hgt2=0&Source+hgt3=0&gis=1&gsize=96&Zoom+Factor=70&projection=0&Vertical+Unit=1&Label+Interval=6&color=Yes&colortype=Yes&pltsrc=1&circle=-1&county=arlmap&psfile=No&pdffile=Yes&mplot=YES&rain=1"
+
+# Largest remainder of the job submission page read just to keep its connection reusable
+_MAX_DRAIN_SIZE = 1 << 20
+# Block size used when copying the results download to disk
+_COPY_BUFSIZE = 1 << 20
+# Retries the session's adapter makes for idempotent requests on connection errors and 502/503/504
+_RETRY_TOTAL = 3
+# (connect, read) timeout in seconds for a single readiness poll request
+_POLL_REQUEST_TIMEOUT = (10, 30)
+# Results at least this large are fetched as parallel range requests
+_RANGED_MIN_SIZE = 4 << 20
+_RANGED_PARTS = 4
+
+def _new_session():
+    """
+    Creates a session with the base headers, a larger connection pool and retries.
+
+    Transient gateway errors (502/503/504) are retried with backoff. urllib3 only
+    retries idempotent methods by default, so the form POSTs are never resubmitted.
+
+    Returns:
+        requests.Session: The configured session.
+    """
+    import requests
+    from requests.adapters import HTTPAdapter
+    from urllib3.util.retry import Retry
+
+    session = requests.Session()
+    session.headers.update(BASE_HEADERS)
+    retries = Retry(total=_RETRY_TOTAL, backoff_factor=0.5, status_forcelist=[502, 503, 504])
+    session.mount("https://", HTTPAdapter(pool_connections=16, pool_maxsize=64, max_retries=retries))
+    return session
+
+# Sessions are kept per thread so back-to-back jobs reuse their connections,
+# while concurrent jobs (see run_many) never share the HYSPLIT session cookie
+_thread_local = threading.local()
+_open_sessions = weakref.WeakSet()
+
+def _get_session():
+    """
+    Returns the calling thread's shared session, creating it on first use.
+
+    Returns:
+        requests.Session: The session for this thread.
+    """
+    session = getattr(_thread_local, "session", None)
+    if session is None:
+        session = _thread_local.session = _new_session()
+        _open_sessions.add(session)
+    return session
+
+@atexit.register
+def _close_sessions():
+    for session in list(_open_sessions):
+        session.close()
+
+def _scan_for_job_id(chunks):
+    """
+    Scans the job submission response body for the job ID, stopping at the first match.
+
+    Args:
+        chunks (iterable of bytes): The response body as it arrives from the server.
+
+    Returns:
+        str: The job ID, or None if the body does not contain the results URL.
+    """
+    buffer = b""
+    for chunk in chunks:
+        buffer += chunk.lower()
+        while True:
+            start = buffer.find(_JOB_ID_MARKER)
+            if start < 0:
+                # Keep just enough of the tail to catch a marker split across two chunks
+                buffer = buffer[1 - len(_JOB_ID_MARKER):]
+                break
+            digits = buffer[start + len(_JOB_ID_MARKER):]
+            rest = digits.lstrip(b"0123456789")
+            if not rest:
+                # The digits may continue in the next chunk
+                buffer = buffer[start:]
+                break
+            if len(rest) < len(digits):
+                # The ID is complete once a non-digit follows it
+                return digits[:len(digits) - len(rest)].decode("ascii")
+            # No digits after this marker, keep searching past it
+            buffer = rest
+    if buffer.startswith(_JOB_ID_MARKER):
+        return buffer[len(_JOB_ID_MARKER):].decode("ascii") or None
+    return None
+
+def _check_start_fields(start_year, start_month, start_day, start_hour):
+    """
+    Validates separate start date fields with plain type and range checks.
+
+    When this returns None, building the start datetime from the fields cannot fail.
+
+    Returns:
+        str: A description of the first invalid field, or None if all are valid.
+    """
+    # Accept any integer type (e.g. numpy.int64) that datetime would, but not bool
+    fields = (start_year, start_month, start_day, start_hour)
+    if any(isinstance(value, bool) for value in fields):
+        return "Invalid date provided. Year, month, day and hour must be integers."
     try:
-        return datetime.date(2000, month, 1).strftime('%b').lower()
-    except ValueError:
-        raise ValueError("Invalid month provided. Must be between 1 and 12.")
-
-def _get_gdas_week_num(day):
-    """Calculates the GDAS week number (1-5) based on the day."""
-    if 1 <= day <= 7:
-        return 1
-    elif 8 <= day <= 14:
-        return 2
-    elif 15 <= day <= 21:
-        return 3
-    elif 22 <= day <= 28:
-        return 4
-    elif 29 <= day <= 31:
-        return 5
-    else:
-        raise ValueError("Invalid day provided. Must be between 1 and 31.")
+        start_year, start_month, start_day, start_hour = map(operator.index, fields)
+    except TypeError:
+        return "Invalid date provided. Year, month, day and hour must be integers."
+    if not 0 <= start_year <= 99:
+        return "Invalid year provided. Must be in 2-digit format (0-99)."
+    if not 1 <= start_month <= 12:
+        return "Invalid month provided. Must be between 1 and 12."
+    if not 1 <= start_day <= _DAYS_IN_MONTH[start_month - 1] + (start_month == 2 and calendar.isleap(2000 + start_year)):
+        return "Invalid day provided. Must be a day of the given month."
+    if not 0 <= start_hour <= 23:
+        return "Invalid hour provided. Must be between 0 and 23."
+    return None
 
 def run_hysplit_job(latitude=41.980000, longitude=-87.900000,
                       start_year=22, start_month=10, start_day=29, start_hour=22):
     """
-    Runs the HYSPLIT job request sequence based on the recorded messages.
+    Runs the HYSPLIT job request sequence from separate start date fields.
+
+    Kept for backward compatibility, see submit_hysplit_job.
 
     Args:
         latitude (float): Starting latitude in decimal degrees. Default is 41.98.
@@ -44,165 +190,261 @@ def run_hysplit_job(latitude=41.980000, longitude=-87.900000,
     Returns:
         tuple: (job_id, session) or (None, None) if failed.
     """
-    session = requests.Session()
+    error = _check_start_fields(start_year, start_month, start_day, start_hour)
+    if error:
+        log.error("Input validation error: %s", error)
+        return None, None
+
+    start = datetime.datetime(2000 + start_year, start_month, start_day, start_hour)
+    return submit_hysplit_job(latitude, longitude, start)
+
+def submit_hysplit_job(latitude, longitude, start):
+    """
+    Runs the HYSPLIT job request sequence based on the recorded messages.
+
+    Args:
+        latitude (float): Starting latitude in decimal degrees.
+        longitude (float): Starting longitude in decimal degrees (negative for West).
+        start (datetime.datetime): Start date and hour of the trajectory.
 
-    # Validate inputs and calculate derived values
+    Returns:
+        tuple: (job_id, session) or (None, None) if failed.
+    """
+    import requests
+
+    # Accept any real number type (e.g. numpy.float32 or Decimal), but not strings
     try:
-        month_abbr = _get_month_abbr(start_month)
-        week_num = _get_gdas_week_num(start_day)
-        # Ensure year is two digits, padding if necessary (e.g., 9 -> 09)
-        year_str = f"{start_year:02d}"
-    except ValueError as e:
-        print(f"Input validation error: {e}")
+        if isinstance(latitude, (str, bytes)) or isinstance(longitude, (str, bytes)):
+            raise TypeError("coordinates must be numbers")
+        latitude, longitude = float(latitude), float(longitude)
+    except (TypeError, ValueError):
+        latitude = longitude = float("nan")
+    if not (-90 <= latitude <= 90 and -180 <= longitude <= 180):
+        log.error("Input validation error: Latitude and longitude must be numbers, between -90 and 90 and between -180 and 180.")
         return None, None
 
+    session = _get_session()
+
+    # Derive the GDAS file name fields from the start date
+    month_abbr = _MONTH_ABBRS[start.month - 1]
+    # Days 1-7 are week 1, 8-14 week 2, ... and 29-31 week 5
+    week_num = (start.day - 1) // 7 + 1
+    year = start.year % 100
+
     # Construct the dynamic mfile name
-    mfile_name = f"gdas1.{month_abbr}{year_str}.w{week_num}"
-    print(f"Using meteorological data file: {mfile_name}")
-
-    # Headers often remain similar, define a base set
-    base_headers = {
-        "accept": "text/html,application/xhtml+xml,application/xml;q=0.9,image/avif,image/webp,image/apng,*/*;q=0.8,application/signed-exchange;v=b3;q=0.7",
-        "accept-language": "en-US,en;q=0.9,sv;q=0.8,ja;q=0.7,de;q=0.6,la;q=0.5",
-        "sec-ch-ua": '"Google Chrome";v="135", "Not-A.Brand";v="8", "Chromium";v="135"',
-        "sec-ch-ua-mobile": "?1",
-        "sec-ch-ua-platform": '"Android"',
-        "sec-fetch-dest": "document",
-        "sec-fetch-mode": "navigate",
-        "sec-fetch-site": "same-origin",
-        "upgrade-insecure-requests": "1",
-        "Referrer-Policy": "strict-origin-when-cross-origin"
-    }
+    mfile_name = f"gdas1.{month_abbr}{year:02d}.w{week_num}"
+    log.info("Using meteorological data file: %s", mfile_name)
 
     # Step 1: POST to trajasrc.pl (Reverse order from messages.json)
     url1 = "https://www.ready.noaa.gov/hypub-bin/trajasrc.pl"
-    headers1 = {**base_headers,
-                "cache-control": "max-age=0",
-                "content-type": "application/x-www-form-urlencoded",
-                "sec-fetch-user": "?1",
-                "Referer": "https://www.ready.noaa.gov/hypub-bin/trajtype.pl?runtype=archive"
-               }
-    data1 = "nsrc=1&trjtype=1"
     try:
-        print(f"POSTing to {url1}")
-        response1 = session.post(url1, headers=headers1, data=data1)
+        log.info("POSTing to %s", url1)
+        response1 = session.post(url1, headers=_HEADERS_STEP1, data=_DATA1)
         response1.raise_for_status()
-        print(f"Status Code: {response1.status_code}")
-        # print(f"Response Text (truncated): {response1.text[:200]}...") # Optional: Log response snippet
-        time.sleep(1) # Add delay
+        log.info("Status Code: %s", response1.status_code)
+        # log.debug("Response Text (truncated): %s...", response1.text[:200]) # Optional: Log response snippet
     except requests.exceptions.RequestException as e:
-        print(f"Error during step 1: {e}")
+        log.error("Error during step 1: %s", e)
         return None, None
 
     # Step 2: POST to trajsrcm.pl
     url2 = "https://www.ready.noaa.gov/hypub-bin/trajsrcm.pl"
-    headers2 = {**base_headers,
-                "cache-control": "max-age=0",
-                "content-type": "application/x-www-form-urlencoded",
-                "sec-fetch-user": "?1",
-                "Referer": "https://www.ready.noaa.gov/hypub-bin/trajasrc.pl"
-               }
 
     # Determine N/S and E/W and absolute values for data2
-    lat_ns = 'N' if latitude >= 0 else 'S'
-    lon_ew = 'E' if longitude >= 0 else 'W'
+    lat_ns = b'N' if latitude >= 0 else b'S'
+    lon_ew = b'E' if longitude >= 0 else b'W'
     abs_lat = abs(latitude)
     abs_lon = abs(longitude)
 
-    data2 = f"metdata=GDAS1&SOURCELOC=decdegree&Lat={abs_lat:.6f}&Latns={lat_ns}&Lon={abs_lon:.6f}&Lonew={lon_ew}&Latd=&Latm=&Lats=&Latdns=N&Lond=&Lonm=&Lons=&Londew=W&CITYNAME=&WMO="
+    data2 = _DATA2_FMT % (abs_lat, lat_ns, abs_lon, lon_ew)
     try:
-        print(f"POSTing to {url2}")
-        response2 = session.post(url2, headers=headers2, data=data2)
+        log.info("POSTing to %s", url2)
+        response2 = session.post(url2, headers=_HEADERS_STEP2, data=data2)
         response2.raise_for_status()
-        print(f"Status Code: {response2.status_code}")
-        # print(f"Response Text (truncated): {response2.text[:200]}...") # Optional: Log response snippet
-        time.sleep(1) # Add delay
+        log.info("Status Code: %s", response2.status_code)
+        # log.debug("Response Text (truncated): %s...", response2.text[:200]) # Optional: Log response snippet
     except requests.exceptions.RequestException as e:
-        print(f"Error during step 2: {e}")
+        log.error("Error during step 2: %s", e)
         return None, None
 
     # Step 3: POST to traj1.pl
     url3 = "https://www.ready.noaa.gov/hypub-bin/traj1.pl"
-    headers3 = {**base_headers,
-                "cache-control": "max-age=0",
-                "content-type": "application/x-www-form-urlencoded",
-                "sec-fetch-user": "?1",
-                "Referer": "https://www.ready.noaa.gov/hypub-bin/trajsrcm.pl"
-               }
     # Use the dynamically generated mfile name
-    data3 = f"mfile={mfile_name}"
+    data3 = _DATA3_PREFIX + mfile_name.encode()
     try:
-        print(f"POSTing to {url3}")
-        response3 = session.post(url3, headers=headers3, data=data3)
+        log.info("POSTing to %s", url3)
+        response3 = session.post(url3, headers=_HEADERS_STEP3, data=data3)
         response3.raise_for_status()
-        print(f"Status Code: {response3.status_code}")
-        # print(f"Response Text (truncated): {response3.text[:200]}...") # Optional: Log response snippet
-        time.sleep(1) # Add delay
+        log.info("Status Code: %s", response3.status_code)
+        # log.debug("Response Text (truncated): %s...", response3.text[:200]) # Optional: Log response snippet
     except requests.exceptions.RequestException as e:
-        print(f"Error during step 3: {e}")
+        log.error("Error during step 3: %s", e)
         return None, None
 
     # Step 4: POST to traj2.pl - This submits the main job parameters
     url4 = "https://www.ready.noaa.gov/hypub-bin/traj2.pl"
-    headers4 = {**base_headers,
-                "cache-control": "max-age=0",
-                "content-type": "application/x-www-form-urlencoded",
-                "sec-fetch-user": "?1",
-                "Referer": "https://www.ready.noaa.gov/hypub-bin/traj1.pl"
-               }
     # Note: data4 expects longitude directly (negative for West)
     # Use the provided start date/time parameters
-    data4 = f"direction=Backward&vertical=0&Start+year={year_str}&Start+month={start_month}&Start+day={start_day}&Start+hour={start_hour}&duration=168&repeatsrc=0&ntrajs=24&Source+lat={latitude:.6f}&Source+lon={longitude:.6f}&Source+lat2=&Source+lon2=&Source+lat3=&Source+lon3=&Midlayer+height=No&Source+hgt1=500&Source+hunit=0&Source+hgt2=0&Source+hgt3=0&gis=1&gsize=96&Zoom+Factor=70&projection=0&Vertical+Unit=1&Label+Interval=6&color=Yes&colortype=Yes&pltsrc=1&circle=-1&county=arlmap&psfile=No&pdffile=Yes&mplot=YES&rain=1"
+    data4 = _DATA4_FMT % (year, start.month, start.day, start.hour, latitude, longitude)
     job_submission_response = None
     try:
-        print(f"POSTing to {url4}")
-        job_submission_response = session.post(url4, headers=headers4, data=data4)
+        log.info("POSTing to %s", url4)
+        # Stream the response so parsing can stop as soon as the job ID shows up
+        job_submission_response = session.post(url4, headers=_HEADERS_STEP4, data=data4, stream=True)
         job_submission_response.raise_for_status()
-        print(f"Status Code: {job_submission_response.status_code}")
+        log.info("Status Code: %s", job_submission_response.status_code)
         # This response HTML contains the link to the results page
-        # print(f"Response Text (truncated): {job_submission_response.text[:500]}...") # Optional: Log response snippet
     except requests.exceptions.RequestException as e:
-        print(f"Error during step 4 (Job Submission): {e}")
+        log.error("Error during step 4 (Job Submission): %s", e)
+        if job_submission_response is not None:
+            job_submission_response.close()
         return None, None
 
     # Step 5: Extract the results URL and job ID from the response of Step 4
     # The response typically contains a meta refresh tag or a link pointing to trajresults.pl?jobidno=XXXXX
-    job_id = None
-    if job_submission_response and job_submission_response.text:
-        # Look for the job ID in meta refresh tag (Corrected regex)
-        # Use raw string r'...' and single backslashes for special regex characters
-        meta_match = re.search(r'CONTENT="\d+;\s*URL=[^"]*/hypub-bin/trajresults\.pl\?jobidno=(\d+)"', job_submission_response.text, re.IGNORECASE)
-        if meta_match:
-            job_id = meta_match.group(1)
-            print(f"Found job ID in meta refresh: {job_id}")
-        else:
-            # Look for the job ID in anchor tags
-            anchor_match = re.search(r'<a href="[^"]*/hypub-bin/trajresults\.pl\?jobidno=(\d+)"', job_submission_response.text, re.IGNORECASE)
-            if anchor_match:
-                job_id = anchor_match.group(1)
-                print(f"Found job ID in link: {job_id}")
-            else:
-                 # Sometimes the job ID might be in the URL if there was a redirect
-                 parsed_url = urlparse(job_submission_response.url)
-                 query_params = parse_qs(parsed_url.query)
-                 if 'jobidno' in query_params:
-                     job_id = query_params['jobidno'][0]
-                     print(f"Found job ID in final URL: {job_id}")
-                 else:
-                    print("Could not find job ID in response HTML or URL.")
-                    # print(f"Final URL: {job_submission_response.url}") # Log the final URL for debugging
-                    # print(f"Response Text: {job_submission_response.text}") # Log full text for debugging
-                    return None, None # Return None for job_id and session
+    try:
+        # Look for the job ID in the meta refresh tag or results link
+        chunks = job_submission_response.iter_content(chunk_size=8192)
+        job_id = _scan_for_job_id(chunks)
+        # Read the rest of the page so close() returns the connection to the pool
+        # instead of dropping it; only give up on that for an unexpectedly large body
+        drained = 0
+        for chunk in chunks:
+            drained += len(chunk)
+            if drained > _MAX_DRAIN_SIZE:
+                break
+    except requests.exceptions.RequestException as e:
+        log.error("Error reading job submission response: %s", e)
+        return None, None
+    finally:
+        job_submission_response.close()
+
+    if job_id:
+        log.info("Found job ID in response HTML: %s", job_id)
     else:
-        print("No response content received from job submission.")
-        return None, None # Return None for job_id and session
+        # Sometimes the job ID might be in the URL if there was a redirect
+        _, found, tail = job_submission_response.url.rpartition("jobidno=")
+        job_id = tail.split("&", 1)[0] if found else None
+        if job_id and job_id.isdigit():
+            log.info("Found job ID in final URL: %s", job_id)
+        else:
+            log.error("Could not find job ID in response HTML or URL.")
+            # log.debug("Final URL: %s", job_submission_response.url) # Log the final URL for debugging
+            return None, None # Return None for job_id and session
 
     # Return the job_id and the session for potential reuse (like downloading)
     return job_id, session
 
+def run_many(params_list, concurrency=8):
+    """
+    Submits several HYSPLIT jobs concurrently.
+
+    Each worker thread uses its own session, since the HYSPLIT form flow keeps
+    per-job state in the session cookie. Jobs handled by the same worker reuse
+    that session one after another.
+
+    Args:
+        params_list (list of dict): Keyword arguments for run_hysplit_job, one dict per job.
+        concurrency (int): Maximum number of jobs submitted at the same time. Default is 8.
+
+    Returns:
+        list: (job_id, session) tuples in the same order as params_list.
+    """
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        return list(executor.map(lambda params: run_hysplit_job(**params), params_list))
+
+def _wait_for_results(session, download_url, timeout=120):
+    """
+    Polls the results URL with HEAD requests until the file is available.
+
+    The delay between polls starts at 0.5 seconds and grows by half each
+    time, capped at 4 seconds. Each request uses the fixed
+    _POLL_REQUEST_TIMEOUT, so a stalled request cannot block forever, while
+    the deadline alone decides when to give up. Timeouts, connection errors
+    and exhausted 5xx retries count as "not ready yet" and polling continues.
+
+    Args:
+        session (requests.Session): The session used for the job submission.
+        download_url (str): URL of the results zip file.
+        timeout (float): Maximum number of seconds to wait. Default is 120.
+
+    Returns:
+        requests.Response: The successful HEAD response, or None if the timeout expires.
+    """
+    import requests
+
+    deadline = time.monotonic() + timeout
+    delay = 0.5
+    while True:
+        try:
+            response = session.head(download_url, allow_redirects=True, timeout=_POLL_REQUEST_TIMEOUT)
+            if response.status_code == 200:
+                return response
+        except (requests.exceptions.RetryError, requests.exceptions.ConnectionError,
+                requests.exceptions.Timeout) as e:
+            log.debug("Results not reachable yet: %s", e)
+        if time.monotonic() + delay > deadline:
+            return None
+        time.sleep(delay)
+        delay = min(delay * 1.5, 4.0)
+
+def _download_ranges(session, download_url, download_filename, size):
+    """
+    Downloads the results file as parallel HTTP range requests written in place.
+
+    Args:
+        session (requests.Session): The session used for the job submission.
+        download_url (str): URL of the results zip file.
+        download_filename (str): Local path to write the file to.
+        size (int): Size of the file in bytes, as reported by the server.
+
+    Returns:
+        bool: True if all parts were downloaded, False if the server ignored the
+        Range header or returned a part of the wrong length.
+    """
+    part_size = -(-size // _RANGED_PARTS)
+
+    with open(download_filename, 'wb', buffering=0) as f:
+        fd = f.fileno()
+        if hasattr(os, 'posix_fallocate'):
+            os.posix_fallocate(fd, 0, size)
+        else:
+            f.truncate(size)
+
+        # The parts share the caller's session across threads. That is safe here
+        # because the workers only issue GETs: the urllib3 pool (sized by
+        # _new_session) and the locked cookie jar handle concurrent use, and
+        # nothing touches the session's headers, adapters or other mutable state.
+        # Unlike the job submission, a static file download has no per-job
+        # cookie state that concurrent requests could mix up.
+        def fetch_part(start):
+            end = min(start + part_size, size) - 1
+            with session.get(download_url, headers={"Range": f"bytes={start}-{end}"}, stream=True) as response:
+                response.raise_for_status()
+                if response.status_code != 206:
+                    log.warning("Server answered %s instead of 206 to a range request.", response.status_code)
+                    return False
+                offset = start
+                for chunk in response.iter_content(chunk_size=_COPY_BUFSIZE):
+                    # pwrite may write less than asked, so write until the chunk is done
+                    view = memoryview(chunk)
+                    while view:
+                        written = os.pwrite(fd, view, offset)
+                        view = view[written:]
+                        offset += written
+                if offset != end + 1:
+                    log.warning("Range %s-%s returned %s bytes instead of %s.", start, end, offset - start, end + 1 - start)
+                    return False
+                return True
+
+        with ThreadPoolExecutor(max_workers=_RANGED_PARTS) as executor:
+            return all(list(executor.map(fetch_part, range(0, size, part_size))))
+
 def download_results(job_id, session, start_year, start_month, start_day, start_hour):
     """
-    Downloads the HYSPLIT results zip file.
+    Downloads the HYSPLIT results zip file, named from separate start date fields.
+
+    Kept for backward compatibility, see download_hysplit_results.
 
     Args:
         job_id (str): The job ID obtained from submission.
@@ -215,78 +457,143 @@ def download_results(job_id, session, start_year, start_month, start_day, start_
     Returns:
         str: The path to the downloaded file, or None if download failed.
     """
+    error = _check_start_fields(start_year, start_month, start_day, start_hour)
+    if error:
+        log.error("Input validation error: %s", error)
+        return None
+
+    start = datetime.datetime(2000 + start_year, start_month, start_day, start_hour)
+    return download_hysplit_results(job_id, session, start)
+
+def download_hysplit_results(job_id, session, start):
+    """
+    Downloads the HYSPLIT results zip file.
+
+    Args:
+        job_id (str): The job ID obtained from submission.
+        session (requests.Session): The session used for the job submission.
+        start (datetime.datetime): Start date and hour the job was submitted with.
+
+    Returns:
+        str: The path to the downloaded file, or None if download failed.
+    """
+    import requests
+
     if not job_id or not session:
-        print("Invalid job ID or session for download.")
+        log.error("Invalid job ID or session for download.")
         return None
 
     # Format the date/time string: YY-MM-DD-HH
-    date_str = f"{start_year:02d}-{start_month:02d}-{start_day:02d}-{start_hour:02d}"
+    date_str = f"{start.year % 100:02d}-{start.month:02d}-{start.day:02d}-{start.hour:02d}"
 
     download_url = f"https://www.ready.noaa.gov/hypubout/gis_{job_id}.zip"
     download_filename = f"gis_{date_str}_{job_id}.zip"
 
-    print(f"Waiting 10 seconds before downloading results for job {job_id}...")
-    time.sleep(10)
+    # Set once download_filename has been (re)created, so a failed download
+    # removes the partial file but never an older file of the same name
+    file_written = False
 
-    print(f"Attempting to download results from: {download_url}")
+    log.info("Waiting for results of job %s to become available...", job_id)
     try:
-        # Use the same session to maintain cookies if necessary
-        # Allow redirects as the server might redirect initially
-        # Stream the download to handle potentially large files
-        response = session.get(download_url, stream=True, allow_redirects=True)
-        response.raise_for_status() # Raise an exception for bad status codes (4xx or 5xx)
+        head_response = _wait_for_results(session, download_url)
+        if head_response is None:
+            log.error("Results for job %s were not available in time.", job_id)
+            return None
 
         # Check if the content looks like a zip file (optional but good practice)
-        content_type = response.headers.get('content-type', '').lower()
+        content_type = head_response.headers.get('content-type', '').lower()
         if 'application/zip' not in content_type and 'application/octet-stream' not in content_type:
              # Sometimes servers might not set the correct content-type, especially for direct file links.
              # Let's be a bit more lenient but print a warning.
-             print(f"Warning: Unexpected content-type '{content_type}'. Proceeding with download.")
+             log.warning("Unexpected content-type '%s'. Proceeding with download.", content_type)
              # We could add more checks here, like content-disposition if needed.
 
+        log.info("Attempting to download results from: %s", download_url)
+
+        # Split large files into parallel range requests when the server supports them
+        size = int(head_response.headers.get('content-length', 0))
+        if (size >= _RANGED_MIN_SIZE
+                and head_response.headers.get('accept-ranges', '').lower() == 'bytes'
+                and 'content-encoding' not in head_response.headers
+                and hasattr(os, 'pwrite')):
+            file_written = True
+            try:
+                complete = _download_ranges(session, download_url, download_filename, size)
+            except (requests.exceptions.RequestException, OSError) as e:
+                log.warning("Range download failed: %s", e)
+                complete = False
+            if complete:
+                log.info("Successfully downloaded results to: %s", download_filename)
+                return download_filename
+            log.warning("Range download incomplete, falling back to a single download.")
+
+        # Use the same session to maintain cookies if necessary
+        # Allow redirects as the server might redirect initially
+        # Stream the download to handle potentially large files
+        response = session.get(download_url, stream=True, allow_redirects=True)
+        response.raise_for_status() # Raise an exception for bad status codes (4xx or 5xx)
+
         # Save the file
+        # Copy in 1 MiB blocks to keep syscalls down. The buffered writer passes
+        # blocks this large straight through but retries short writes, which a
+        # raw unbuffered file would silently drop.
+        file_written = True
         with open(download_filename, 'wb') as f:
-            # Use shutil.copyfileobj for efficient file writing
-            shutil.copyfileobj(response.raw, f)
+            shutil.copyfileobj(response.raw, f, length=_COPY_BUFSIZE)
 
-        print(f"Successfully downloaded results to: {download_filename}")
+        log.info("Successfully downloaded results to: %s", download_filename)
         return download_filename
 
     except requests.exceptions.RequestException as e:
-        print(f"Error downloading results for job {job_id}: {e}")
+        log.error("Error downloading results for job %s: %s", job_id, e)
         # Check for specific status codes if needed (e.g., 404 Not Found)
         if hasattr(e, 'response') and e.response is not None:
-            print(f"Status Code: {e.response.status_code}")
-            # print(f"Response Headers: {e.response.headers}") # Debug headers
-            # print(f"Response Text (partial): {e.response.text[:200]}...") # Debug response text if not binary
-        return None
+            log.error("Status Code: %s", e.response.status_code)
+            # log.debug("Response Headers: %s", e.response.headers) # Debug headers
+            # log.debug("Response Text (partial): %s...", e.response.text[:200]) # Debug response text if not binary
     except Exception as e: # Catch other potential errors like file writing issues
-        print(f"An unexpected error occurred during download: {e}")
-        return None
+        log.error("An unexpected error occurred during download: %s", e)
+
+    # Don't leave a truncated or zero-filled zip behind
+    if file_written:
+        try:
+            os.remove(download_filename)
+        except OSError:
+            pass
+    return None
 
 if __name__ == "__main__":
-    print("Starting HYSPLIT job submission...")
-    # Define parameters (or use argparse later)
-    lat = 41.980000
-    lon = -87.900000
-    year = 22
-    month = 10
-    day = 29
-    hour = 22
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Submit a HYSPLIT backward trajectory job and download the GIS results.")
+    parser.add_argument("--lat", type=float, default=41.980000, help="Starting latitude in decimal degrees (default: %(default)s)")
+    parser.add_argument("--lon", type=float, default=-87.900000, help="Starting longitude in decimal degrees, negative for West (default: %(default)s)")
+    parser.add_argument("--year", type=int, default=22, help="Start year, 2-digit format (default: %(default)s)")
+    parser.add_argument("--month", type=int, default=10, help="Start month, 1-12 (default: %(default)s)")
+    parser.add_argument("--day", type=int, default=29, help="Start day, 1-31 (default: %(default)s)")
+    parser.add_argument("--hour", type=int, default=22, help="Start hour, 0-23 (default: %(default)s)")
+    parser.add_argument("-q", "--quiet", action="store_true", help="Only report warnings and errors")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.WARNING if args.quiet else logging.INFO, format="%(levelname)s: %(message)s")
+
+    log.info("Starting HYSPLIT job submission...")
+    lat, lon = args.lat, args.lon
+    year, month, day, hour = args.year, args.month, args.day, args.hour
 
     # Call with defined parameters
     job_id, session = run_hysplit_job(latitude=lat, longitude=lon,
                                       start_year=year, start_month=month, start_day=day, start_hour=hour)
 
     if job_id and session:
-        print(f"Successfully submitted job. Job ID: {job_id}")
-        print(f"Check results page at: https://www.ready.noaa.gov/hypub-bin/trajresults.pl?jobidno={job_id}")
+        log.info("Successfully submitted job. Job ID: %s", job_id)
+        log.info("Check results page at: https://www.ready.noaa.gov/hypub-bin/trajresults.pl?jobidno=%s", job_id)
 
         # Attempt to download the results, passing date/time info for filename
         downloaded_file = download_results(job_id, session, year, month, day, hour)
         if downloaded_file:
-            print(f"Result download successful: {downloaded_file}")
+            log.info("Result download successful: %s", downloaded_file)
         else:
-            print("Result download failed.")
+            log.error("Result download failed.")
     else:
-        print("Job submission failed.") 
\ No newline at end of file
+        log.error("Job submission failed.") 